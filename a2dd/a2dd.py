@@ -15,14 +15,134 @@ import os
 
 from ruamel.yaml.comments import CommentedMap as Map
 
-from a2dd.constants import BLOCK_ATTRS, PLAYBOOK_ATTRS, TASK_ATTRS
-from a2dd.utils import get_task_action, string2dict, yaml_dump, yaml_load
+from a2dd.constants import (
+    BLOCK_ATTRS,
+    NOT_IMPLEMENTED_MSG,
+    PLAYBOOK_ATTRS,
+    TASK_ATTRS,
+)
+from a2dd.utils import (
+    get_task_action,
+    string2dict,
+    yaml_dump_fast,
+    yaml_load_file,
+)
+
+# Task keys which include a file of tasks
+_INCLUDE_KEYS = frozenset({"include", "include_tasks", "import_tasks"})
+# Attributes which are not parsed and go to the context comments
+_BLOCK_CTX_KEYS = BLOCK_ATTRS - {"block", "environment"}
+_INCLUDE_CTX_KEYS = TASK_ATTRS - {"include", "include_tasks", "environment"}
+_PLAY_CTX_KEYS = PLAYBOOK_ATTRS - {
+    "environment",
+    "hosts",
+    "gather_facts",
+    "tasks",
+    "pre_tasks",
+    "post_tasks",
+    "vars",
+}
+
+# Shell task keys which are parsed and don't go to the task context
+_SHELL_STRIP = frozenset({"environment", "chdir", "name", "args"})
+
+# Flags of DirectorD SERVICE for service and systemd module options
+_SERVICE_STATE_FLAGS = {
+    "stopped": "--stopped",
+    "restarted": "--restarted",
+    "reloaded": "--reloaded",
+}
+_SERVICE_ENABLED_FLAGS = {True: "--enable", False: "--disable"}
+_SERVICE_MASKED_FLAGS = {True: "--mask", False: "--unmask"}
+
+
+def env_exports(context):
+    """Return shell export commands for environment of a play, block or task.
+
+    Args:
+        context (dict): Play, block or task loaded from YAML, may be None
+
+    Returns:
+        tuple: Export commands as strings
+    """
+    if not context or not context.get("environment"):
+        return ()
+    return tuple(
+        f'export {k}="{v}";' for k, v in context["environment"].items()
+    )
+
+
+def env_jobs(context, kind):
+    """Return DirectorD ENV jobs for environment of a play, block or include.
+
+    Args:
+        context (dict): Play, block or include loaded from YAML
+        kind (str): Kind of context used in the job names
+
+    Returns:
+        generator: ENV jobs as dictionaries
+    """
+    env = context.get("environment") or {}
+    return (
+        {"NAME": f"Set {kind} env value for {k}", "ENV": f"{k} {v}"}
+        for k, v in env.items()
+    )
+
+
+def parent_context(play=None, role=None, include=None, block=None):
+    """Return contexts of outer play, role, include and block of a task.
+
+    Returns:
+        str: Contexts as commented lines, outer contexts go first
+    """
+    return "\n".join(
+        parent["context"]
+        for parent in (play, role, include, block)
+        if parent and "context" in parent
+    )
+
+
+def backup_validate(options, dest):
+    """Return backup path and validation jobs of copy or template task.
+
+    File is validated on its backup copy, so validation requires a backup,
+    which is removed afterwards if it wasn't requested.
+
+    Args:
+        options (dict): Options of copy or template module
+        dest (str): Destination path of the file
+
+    Returns:
+        tuple: (str, list) : Backup path or None if no backup is needed,
+                             list of validation DirectorD tasks.
+    """
+    backup = options.get("backup")
+    validate = options.get("validate")
+    if not (backup or validate):
+        return None, []
+    backup_path = f"{dest}.backup"
+    if not validate:
+        return backup_path, []
+    validate_tasks = [{"RUN": validate.replace("%s", backup_path)}]
+    if backup is None:
+        validate_tasks.append({"RUN": f"rm -f {backup_path}"})
+    return backup_path, validate_tasks
 
 
 class AnsibleTask:
     """AnsibleTask class parses a single task."""
 
-    def __init__(self, task, block=None, include=None, role=None, play=None):
+    def __init__(
+        self,
+        task,
+        block=None,
+        include=None,
+        role=None,
+        play=None,
+        play_env=None,
+        block_env=None,
+        parent_ctx=None,
+    ):
         """Set context for task.
 
         Args:
@@ -31,12 +151,25 @@ class AnsibleTask:
             include (dict, optional): Include context. Defaults to None.
             role (dict, optional): Role context. Defaults to None.
             play (dict, optional): Playbook context. Defaults to None.
+            play_env (tuple, optional): Precomputed playbook env exports.
+                Defaults to exports from playbook context.
+            block_env (tuple, optional): Precomputed block env exports.
+                Defaults to exports from block context.
+            parent_ctx (str, optional): Precomputed contexts of outer play,
+                role, include and block. Defaults to their parent_context.
         """
         self.task = task
         self.block = block
         self.include = include
         self.role = role
         self.play = play
+        self.play_env = env_exports(play) if play_env is None else play_env
+        self.block_env = env_exports(block) if block_env is None else block_env
+        self.parent_ctx = (
+            parent_context(play, role, include, block)
+            if parent_ctx is None
+            else parent_ctx
+        )
 
     def parse(self):
         """Parser for task.
@@ -50,8 +183,8 @@ class AnsibleTask:
         task_module = get_task_action(self.task)
         # Let's assume task names are unique in all collections we use
         # Remove collection part of it
-        if "." in task_module:
-            new_task_module = task_module.split(".")[-1]
+        _, sep, new_task_module = task_module.rpartition(".")
+        if sep:
             self.task[new_task_module] = self.task.pop(task_module)
             task_module = new_task_module
         if isinstance(self.task[task_module], str) and (
@@ -63,47 +196,40 @@ class AnsibleTask:
                 f"Can not parse module {task_module} - "
                 "use a specific class for it"
             )
-        parsed_attrs = (task_module, "name")
-        task_args = {
-            k: v for k, v in self.task.items() if k not in parsed_attrs
-        }
+        # Plain dict, comments of the source task are not copied
+        task_args = dict(self.task)
+        del task_args[task_module]
+        task_args.pop("name", None)
         name = self.task.get("name", "Unnamed task")
 
-        func_name = "task_" + task_module
+        handler = self._HANDLERS.get(task_module)
         tasks_parsed = []
-        if not hasattr(self, func_name):
-            task_context = yaml_dump(self.task)
-            tasks_parsed = [
-                Map(
-                    {
-                        "NAME": name,
-                        "ECHO": (
-                            f"Conversion of task module '{task_module}' is not"
-                            " implemented yet!"
-                        ),
-                    }
-                )
-            ]
+        if handler is None:
+            task_context = self.task
+            echo_task = Map()
+            echo_task["NAME"] = name
+            echo_task["ECHO"] = NOT_IMPLEMENTED_MSG.format(task_module)
+            tasks_parsed = [echo_task]
         else:
-            parsed, task_context = getattr(self, func_name)(task_args)
+            parsed, task_context = handler(self, task_args)
             if parsed:
                 for each_task in parsed:
-                    named_task = {"NAME": name}  # for NAME to be on the top
+                    named_task = Map()
+                    named_task["NAME"] = name  # NAME on the top
                     named_task.update(each_task)
-                    tasks_parsed.append(Map(named_task))
-            if task_context:
-                task_context = yaml_dump(task_context)
+                    tasks_parsed.append(named_task)
+        if not tasks_parsed:
+            return tasks_parsed
 
-        context = ""
+        # Dump unparsed task lines only when there is a task to comment
         if task_context:
-            context = f"TASK-CONTEXT:\n{task_context}"
-        for add_context in (self.block, self.include, self.role, self.play):
-            if add_context and "context" in add_context:
-                context = "\n".join([add_context["context"], context])
-        context = f"\n{context}"
-        if context:
-            for task in tasks_parsed:
-                task.yaml_set_start_comment(context)
+            task_context = yaml_dump_fast(task_context)
+        # Comment starts with an empty line, outer contexts go first
+        context = f"\n{self.parent_ctx}\n" if self.parent_ctx else "\n"
+        if task_context:
+            context += f"TASK-CONTEXT:\n{task_context}"
+        for task in tasks_parsed:
+            task.yaml_set_start_comment(context)
         return tasks_parsed
 
     def task_shell(self, task_args):
@@ -121,28 +247,25 @@ class AnsibleTask:
         """
         exe = []
         action = "shell" if "shell" in self.task else "command"
-        run = self.task[action]
-        if isinstance(run, dict):
-            if "args" in self.task and "cmd" in self.task["args"]:
-                run = self.task["args"]["cmd"]
-            if "cmd" in run:
-                run = run["cmd"]
+        run = action_args = self.task[action]
+        args = self.task.get("args") or {}
+        if isinstance(action_args, dict):
+            run = args.get("cmd") or action_args.get("cmd")
+        else:
+            action_args = {}
         if not isinstance(run, str):
             raise ValueError(f"Can not get shell command from: {self.task}")
-        if "chdir" in self.task.get("args", {}):
-            exe.append(f'cd {self.task["args"]["chdir"]};')
-        elif "chdir" in self.task[action]:
-            exe.append(f'cd {self.task[action]["chdir"]};')
-        for env in [
-            i for i in (self.play, self.block, self.task) if i is not None
-        ]:
-            if "environment" in env:
-                for k, v in env["environment"].items():
-                    exe.append(f'export {k}="{v}";')
+        chdir = args.get("chdir") or action_args.get("chdir")
+        if chdir:
+            exe.append(f"cd {chdir};")
+        exe.extend(self.play_env)
+        exe.extend(self.block_env)
+        exe.extend(env_exports(self.task))
         exe.append(run)
         # Not parsed lines go to task-context for future implementation
-        for i in ("environment", "chdir", "name", "args"):
-            task_args.pop(i, None)
+        task_args = {
+            k: v for k, v in task_args.items() if k not in _SHELL_STRIP
+        }
         return [{"RUN": "\n".join(exe)}], task_args
 
     def task_command(self, task_args):
@@ -170,10 +293,11 @@ class AnsibleTask:
             tuple: (list, list) : List of DirectorD tasks as dictionaries with
                                   list of unparsed lines as comments.
         """
-        args = []
-        for arg in list(self.task["set_fact"].items()):
-            if arg[0] != "cacheable":
-                args.append({"ARG": f'{arg[0]} "{arg[1]}"'})
+        args = [
+            {"ARG": f'{k} "{v}"'}
+            for k, v in self.task["set_fact"].items()
+            if k != "cacheable"
+        ]
         return args, task_args
 
     def task_dnf(self, task_args):
@@ -206,9 +330,11 @@ class AnsibleTask:
         exclude = task.get("exclude", "")
         if exclude:
             exclude = f'--exclude "{exclude}"'
-        for k, v in task.items():
-            if k not in ("name", "state", "exclude"):
-                raise ValueError(f"Not implemented key in dnf task: {k}: {v}")
+        extra = task.keys() - {"name", "state", "exclude"}
+        if extra:
+            raise ValueError(
+                f"Not implemented keys in dnf task: {', '.join(sorted(extra))}"
+            )
         if pkgs == "*" and state == "latest":
             return [{"RUN": f"dnf update -y {exclude}"}], task_args
 
@@ -221,7 +347,8 @@ class AnsibleTask:
         elif state == "absent":
             args.append("--absent")
 
-        dnf = [{"DNF": " ".join(args + pkgs)}]
+        args.extend(pkgs)
+        dnf = [{"DNF": " ".join(args)}]
         return dnf, task_args
 
     def task_package(self, task_args):
@@ -276,21 +403,16 @@ class AnsibleTask:
         names = self.task["service"]["name"]
         if isinstance(names, str):
             names = [names]
-        state = self.task["service"].get("state")
-        if state is not None:
-            if state == "stopped":
-                servargs.append("--stopped")
-            elif state == "restarted":
-                servargs.append("--restarted")
-            elif state == "reloaded":
-                servargs.append("--reloaded")
+        state_flag = _SERVICE_STATE_FLAGS.get(
+            self.task["service"].get("state")
+        )
+        if state_flag:
+            servargs.append(state_flag)
         enabled = self.task["service"].get("enabled")
         if enabled is not None:
-            if enabled:
-                servargs.append("--enable")
-            else:
-                servargs.append("--disable")
-        service = [{"SERVICE": " ".join(servargs + names)}]
+            servargs.append(_SERVICE_ENABLED_FLAGS[bool(enabled)])
+        servargs.extend(names)
+        service = [{"SERVICE": " ".join(servargs)}]
         return service, task_args
 
     def task_systemd(self, task_args):
@@ -305,32 +427,24 @@ class AnsibleTask:
         """
         servargs = []
         name = self.task["systemd"]["name"]
-        state = self.task["systemd"].get("state")
-        if state is not None:
-            if state == "stopped":
-                servargs.append("--stopped")
-            elif state == "restarted":
-                servargs.append("--restarted")
-            elif state == "reloaded":
-                servargs.append("--reloaded")
+        state_flag = _SERVICE_STATE_FLAGS.get(
+            self.task["systemd"].get("state")
+        )
+        if state_flag:
+            servargs.append(state_flag)
         enabled = self.task["systemd"].get("enabled")
         if enabled is not None:
-            if enabled:
-                servargs.append("--enable")
-            else:
-                servargs.append("--disable")
+            servargs.append(_SERVICE_ENABLED_FLAGS[bool(enabled)])
         masked = self.task["systemd"].get("masked")
         if masked is not None:
-            if masked:
-                servargs.append("--mask")
-            else:
-                servargs.append("--unmask")
+            servargs.append(_SERVICE_MASKED_FLAGS[bool(masked)])
         reload = self.task["systemd"].get(
             "daemon_reload", self.task["systemd"].get("daemon-reload")
         )
         if reload:
             servargs.append("--daemon-reload")
-        service = [{"SERVICE": " ".join(servargs + [name])}]
+        servargs.append(name)
+        service = [{"SERVICE": " ".join(servargs)}]
         return service, task_args
 
     def task_copy(self, task_args):
@@ -344,22 +458,20 @@ class AnsibleTask:
                                   list of unparsed lines as comments.
         """
         copyargs = []
-        dest = self.task["copy"]["dest"]
-        src = self.task["copy"].get("src")
-        force = self.task["copy"].get("force", True)
-        mode = self.task["copy"].get("mode")
+        copy_opts = self.task["copy"]
+        dest = copy_opts["dest"]
+        src = copy_opts.get("src")
+        force = copy_opts.get("force", True)
+        mode = copy_opts.get("mode")
         if isinstance(mode, str):
             mode = int(mode, 8)
-        owner = self.task["copy"].get("owner")
-        group = self.task["copy"].get("group")
-        selevel = self.task["copy"].get("selevel")
-        setype = self.task["copy"].get("setype")
-        seuser = self.task["copy"].get("seuser")
-        backup = self.task["copy"].get("backup")
-        validate = self.task["copy"].get("validate")
-        if backup:
-            backup = "backup"
-        content = self.task["copy"].get("content")
+        owner = copy_opts.get("owner")
+        group = copy_opts.get("group")
+        selevel = copy_opts.get("selevel")
+        setype = copy_opts.get("setype")
+        seuser = copy_opts.get("seuser")
+        backup, validate = backup_validate(copy_opts, dest)
+        content = copy_opts.get("content")
         if content:
             raise NotImplementedError(
                 "Content in copy task is not supported yet"
@@ -372,15 +484,7 @@ class AnsibleTask:
         elif owner or group:
             copyargs.append(f"--chown {owner or group}")
 
-        if validate:
-            backup = "backup"
-            validate = [{"RUN": f"{validate.replace('%s', dest + '.backup')}"}]
-            if self.task["copy"].get("backup") is None:
-                validate += [{"RUN": f"rm -f {dest + '.backup'}"}]
-        else:
-            validate = []
-
-        if self.task["copy"].get("remote_src"):
+        if copy_opts.get("remote_src"):
             if src:
                 copy = [{"RUN": f"cp -r {src} {dest}"}]
                 if owner or group:
@@ -392,12 +496,8 @@ class AnsibleTask:
                     copy.append({"RUN": f"chown -R {owner_group} {dest}"})
                 if mode:
                     copy.append({"RUN": f"chmod -R 0{mode:o} {dest}"})
-                if backup or validate:
-                    copy = (
-                        [{"RUN": f"cp -r {src} {dest}.{backup}"}]
-                        + validate
-                        + copy
-                    )
+                if backup:
+                    copy = [{"RUN": f"cp -r {src} {backup}"}] + validate + copy
 
             else:
 
@@ -411,19 +511,11 @@ class AnsibleTask:
             if src:
                 if not force:
                     raise NotImplementedError("Force is not implemented yet")
-                copy = [{"COPY": " ".join(copyargs + [src, dest])}]
-                if backup or validate:
-                    copy = (
-                        [
-                            {
-                                "COPY": " ".join(
-                                    copyargs + [src, f"{dest}.{backup}"]
-                                )
-                            }
-                        ]
-                        + validate
-                        + copy
-                    )
+                copyargs.append(src)
+                copy_src = " ".join(copyargs)
+                copy = [{"COPY": f"{copy_src} {dest}"}]
+                if backup:
+                    copy = [{"COPY": f"{copy_src} {backup}"}] + validate + copy
             else:
                 if not content:
                     raise ValueError("No src or content in copy task")
@@ -436,7 +528,8 @@ class AnsibleTask:
                 seargs.append(f"--setype {setype}")
             if seuser:
                 seargs.append(f"--seuser {seuser}")
-            sec = [{"SECONTEXT": " ".join(seargs + [dest])}]
+            seargs.append(dest)
+            sec = [{"SECONTEXT": " ".join(seargs)}]
             copy += sec
         return copy, task_args
 
@@ -451,44 +544,32 @@ class AnsibleTask:
                                   list of unparsed lines as comments.
         """
         templargs = ["--blueprint"]
-        dest = self.task["template"]["dest"]
-        src = self.task["template"].get("src")
-        force = self.task["template"].get("force", True)
+        templ_opts = self.task["template"]
+        dest = templ_opts["dest"]
+        src = templ_opts.get("src")
+        force = templ_opts.get("force", True)
         if not force:
             raise NotImplementedError("Force is not implemented yet")
-        mode = self.task["template"].get("mode")
+        mode = templ_opts.get("mode")
         if isinstance(mode, str):
             mode = int(mode, 8)
-        owner = self.task["template"].get("owner")
-        group = self.task["template"].get("group")
-        selevel = self.task["template"].get("selevel")
-        setype = self.task["template"].get("setype")
-        seuser = self.task["template"].get("seuser")
-        backup = self.task["template"].get("backup")
-        validate = self.task["template"].get("validate")
-        if backup:
-            backup = "backup"
+        owner = templ_opts.get("owner")
+        group = templ_opts.get("group")
+        selevel = templ_opts.get("selevel")
+        setype = templ_opts.get("setype")
+        seuser = templ_opts.get("seuser")
+        backup, validate = backup_validate(templ_opts, dest)
         if mode:
             templargs.append(f"--chmod 0{mode:o}")
         if owner and group:
             templargs.append(f"--chown {owner}:{group}")
         elif owner or group:
             templargs.append(f"--chown {owner or group}")
-        if validate:
-            backup = "backup"
-            validate = [{"RUN": f"{validate.replace('%s', dest + '.backup')}"}]
-            if self.task["template"].get("backup") is None:
-                validate += [{"RUN": f"rm -f {dest + '.backup'}"}]
-        else:
-            validate = []
-
-        copy = [{"COPY": " ".join(templargs + [src, dest])}]
-        if backup or validate:
-            copy = (
-                [{"COPY": " ".join(templargs + [src, f"{dest}.{backup}"])}]
-                + validate
-                + copy
-            )
+        templargs.append(src)
+        copy_src = " ".join(templargs)
+        copy = [{"COPY": f"{copy_src} {dest}"}]
+        if backup:
+            copy = [{"COPY": f"{copy_src} {backup}"}] + validate + copy
 
         if selevel or setype or seuser:
             seargs = []
@@ -498,7 +579,8 @@ class AnsibleTask:
                 seargs.append(f"--setype {setype}")
             if seuser:
                 seargs.append(f"--seuser {seuser}")
-            sec = [{"SECONTEXT": " ".join(seargs + [dest])}]
+            seargs.append(dest)
+            sec = [{"SECONTEXT": " ".join(seargs)}]
             copy += sec
         return copy, task_args
 
@@ -553,17 +635,18 @@ class AnsibleTask:
                 )
             return run
 
-        path = self.task["file"]["path"]
-        state = self.task["file"].get("state", "file")
-        mode = self.task["file"].get("mode")
+        file_opts = self.task["file"]
+        path = file_opts["path"]
+        state = file_opts.get("state", "file")
+        mode = file_opts.get("mode")
         if isinstance(mode, str):
             mode = int(mode, 8)
-        owner = self.task["file"].get("owner")
-        group = self.task["file"].get("group")
-        selevel = self.task["file"].get("selevel")
-        setype = self.task["file"].get("setype")
-        seuser = self.task["file"].get("seuser")
-        recurse = self.task["file"].get("recurse")
+        owner = file_opts.get("owner")
+        group = file_opts.get("group")
+        selevel = file_opts.get("selevel")
+        setype = file_opts.get("setype")
+        seuser = file_opts.get("seuser")
+        recurse = file_opts.get("recurse")
         if state == "directory":
             wrkdir_args = []
             sec = []
@@ -581,8 +664,10 @@ class AnsibleTask:
                     seargs.append(f"--setype {setype}")
                 if seuser:
                     seargs.append(f"--seuser {seuser}")
-                sec = [{"SECONTEXT": " ".join(seargs + [path])}]
-            result = {"WORKDIR": f"{' '.join(wrkdir_args + [path]).lstrip()}"}
+                seargs.append(path)
+                sec = [{"SECONTEXT": " ".join(seargs)}]
+            wrkdir_args.append(path)
+            result = {"WORKDIR": " ".join(wrkdir_args).lstrip()}
             if not recurse:
                 return [result] + sec, task_args
             else:
@@ -625,6 +710,22 @@ class AnsibleTask:
         else:
             raise NotImplementedError(f"Not implemented file state {state}")
 
+    # Parsers of task modules, dispatched by module name
+    _HANDLERS = {
+        "shell": task_shell,
+        "command": task_command,
+        "set_fact": task_set_fact,
+        "dnf": task_dnf,
+        "package": task_package,
+        "yum": task_yum,
+        "setup": task_setup,
+        "service": task_service,
+        "systemd": task_systemd,
+        "copy": task_copy,
+        "template": task_template,
+        "file": task_file,
+    }
+
 
 class AnsibleBlock:
     """AnsibleBlock class parses a single tasks block."""
@@ -637,6 +738,7 @@ class AnsibleBlock:
         """
         self.block = block
         self.kwargs = kwargs
+        self.env = env_exports(block)
 
     def add_context(self):
         """Add block context - all options which we don't parse currently.
@@ -646,7 +748,7 @@ class AnsibleBlock:
         """
         block_context = ["## BLOCK-CONTEXT:"]
         for part in self.block:
-            if part in BLOCK_ATTRS and part not in ("block", "environment"):
+            if part in _BLOCK_CTX_KEYS:
                 block_context.append(f"{part}: {self.block[part]}")
         return "\n".join(block_context)
 
@@ -656,23 +758,22 @@ class AnsibleBlock:
         Returns:
             list: List of maps with parsed tasks.
         """
-        result = []
-        if "environment" in self.block:
-            for k, v in self.block["environment"].items():
-                result.append(
-                    Map(
-                        {
-                            "NAME": f"Set block env value for {k}",
-                            "ENV": f"{k} {v}",
-                        }
-                    )
-                )
+        return list(self.iter_parse())
+
+    def iter_parse(self):
+        """Parse block of tasks lazily.
 
+        Yields:
+            dict: Parsed tasks, commented ones as ruamel Maps.
+        """
+        yield from env_jobs(self.block, "block")
         self.block["context"] = self.add_context()
-        result = AnsibleTasksList(
-            self.block["block"], block=self.block, **self.kwargs
-        ).parse()
-        return result
+        yield from AnsibleTasksList(
+            self.block["block"],
+            block=self.block,
+            block_env=self.env,
+            **self.kwargs,
+        ).iter_parse()
 
 
 class AnsibleIncludeTasks:
@@ -696,11 +797,7 @@ class AnsibleIncludeTasks:
         """
         include_context = ["## INCLUDE-CONTEXT:"]
         for part in self.include:
-            if part in TASK_ATTRS and part not in (
-                "include",
-                "include_tasks",
-                "environment",
-            ):
+            if part in _INCLUDE_CTX_KEYS:
                 include_context.append(f"{part}: {self.include[part]}")
         return "\n".join(include_context)
 
@@ -710,30 +807,26 @@ class AnsibleIncludeTasks:
         Returns:
             list: List of maps with parsed tasks.
         """
-        result = []
-        if "environment" in self.include:
-            for k, v in self.include["environment"].items():
-                result.append(
-                    Map(
-                        {
-                            "NAME": f"Set include env value for {k}",
-                            "ENV": f"{k} {v}",
-                        }
-                    )
-                )
+        return list(self.iter_parse())
 
+    def iter_parse(self):
+        """Parse file with tasks lazily.
+
+        Yields:
+            dict: Parsed tasks, commented ones as ruamel Maps.
+        """
+        yield from env_jobs(self.include, "include")
         self.include["context"] = self.add_context()
         tasks_file = self.include.get("include") or self.include.get(
             "include_tasks"
         )
         if self.prefix:
             tasks_file = os.path.join(self.prefix, tasks_file)
-        with open(tasks_file, "r", encoding="utf-8") as f:
-            tasks = yaml_load(f)
-        result = AnsibleTasksList(
+        # Included tasks are only parsed, round trip loading is not needed
+        tasks = yaml_load_file(tasks_file)
+        yield from AnsibleTasksList(
             tasks, include=self.include, **self.kwargs
-        ).parse()
-        return result
+        ).iter_parse()
 
 
 class AnsibleTasksList:
@@ -755,24 +848,37 @@ class AnsibleTasksList:
         Returns:
             list: List of maps with parsed tasks.
         """
-        result = []
+        return list(self.iter_parse())
+
+    def iter_parse(self):
+        """Parse a list of tasks lazily, flattening blocks and includes.
+
+        Yields:
+            dict: Parsed tasks, commented ones as ruamel Maps.
+        """
+        # Contexts of outer play, role, include and block are the same for
+        # all tasks in the list
+        parent_ctx = parent_context(
+            self.kwargs.get("play"),
+            self.kwargs.get("role"),
+            self.kwargs.get("include"),
+            self.kwargs.get("block"),
+        )
         for task in self.tasks:
-            if "block" in task:
+            keys = task.keys()
+            if "block" in keys:
                 block = AnsibleBlock(task, **self.kwargs)
-                result.extend(block.parse())
-            elif (
-                "include" in task
-                or "include_tasks" in task
-                or "import_tasks" in task
-            ):
+                yield from block.iter_parse()
+            elif not keys.isdisjoint(_INCLUDE_KEYS):
                 incl = AnsibleIncludeTasks(
                     task, prefix=self.prefix, **self.kwargs
                 )
-                result.extend(incl.parse())
+                yield from incl.iter_parse()
             else:
-                task_repr = AnsibleTask(task, **self.kwargs)
-                result.extend(task_repr.parse())
-        return result
+                task_repr = AnsibleTask(
+                    task, parent_ctx=parent_ctx, **self.kwargs
+                )
+                yield from task_repr.parse()
 
 
 class AnsiblePlay:
@@ -785,6 +891,7 @@ class AnsiblePlay:
             playbook (dict): Dictionary of playbook loaded from YAML
         """
         self.playbook = playbook
+        self.env = env_exports(playbook)
 
     def add_context(self):
         """Add playbook context - all options which we don't parse currently.
@@ -794,15 +901,7 @@ class AnsiblePlay:
         """
         play_context = ["## PLAYBOOK-CONTEXT:"]
         for part in self.playbook:
-            if part in PLAYBOOK_ATTRS and part not in (
-                "environment",
-                "hosts",
-                "gather_facts",
-                "tasks",
-                "pre_tasks",
-                "post_tasks",
-                "vars",
-            ):
+            if part in _PLAY_CTX_KEYS:
                 play_context.append(f"{part}: {self.playbook[part]}")
         return "\n".join(play_context)
 
@@ -817,64 +916,58 @@ class AnsiblePlay:
         """
         play_result = []
         play_dict = {}
-        if "environment" in self.playbook:
-            for k, v in self.playbook["environment"].items():
-                play_result.append(
-                    Map(
-                        {
-                            "NAME": f"Set playbook env value for {k}",
-                            "ENV": f"{k} {v}",
-                        }
-                    )
-                )
+        play_result.extend(env_jobs(self.playbook, "playbook"))
         if "vars" in self.playbook:
-            for k, v in self.playbook["vars"].items():
-                play_result.append(
-                    Map(
-                        {
-                            "NAME": f"Set playbook arg value for {k}",
-                            "ARG": f"{k} {v}",
-                        }
-                    )
-                )
+            play_result.extend(
+                {"NAME": f"Set playbook arg value for {k}", "ARG": f"{k} {v}"}
+                for k, v in self.playbook["vars"].items()
+            )
         if self.playbook.get("gather_facts", False):
             play_result.append(
-                Map(
-                    {
-                        "NAME": "Gather facts for playbook",
-                        "FACTER": "",
-                    }
-                )
+                {
+                    "NAME": "Gather facts for playbook",
+                    "FACTER": "",
+                }
             )
         self.playbook["context"] = self.add_context()
         targets = self.playbook["hosts"]
         if targets != "all":
             play_dict["targets"] = targets
-        for step in self.playbook:
-            if step == "roles":
-                raise NotImplementedError("Roles are not supported yet!")
-            if step in ("pre-tasks", "tasks", "post-tasks"):
+        if "roles" in self.playbook:
+            raise NotImplementedError("Roles are not supported yet!")
+        for step in ("pre_tasks", "tasks", "post_tasks"):
+            if step in self.playbook:
                 tasks_list = AnsibleTasksList(
-                    self.playbook[step], play=self.playbook
+                    self.playbook[step], play=self.playbook, play_env=self.env
                 )
                 play_result.extend(tasks_list.parse())
         play_dict.update({"jobs": play_result})
         return play_dict
 
 
+def vars_jobs(vars_content):
+    """Return DirectorD ARG jobs for vars.
+
+    Args:
+        vars_content (dict): Vars loaded from YAML
+
+    Returns:
+        list: ARG jobs as dictionaries
+    """
+    return [{"ARG": f"{k} {v}"} for k, v in vars_content.items()]
+
+
 def vars_parse(vars_content=None):
     """Parse vars file.
 
     Args:
-        vars_path (str, optional): Path to vars file. Defaults to None.
+        vars_content (dict, optional): Vars loaded from YAML.
+            Defaults to None.
 
     Returns:
         result (list): List of maps with parsed vars.
     """
-    result = []
-    for var in vars_content:
-        result.append({"ARG": f"{var} {vars_content[var]}"})
-    return [{"jobs": result}]
+    return [{"jobs": vars_jobs(vars_content)}]
 
 
 def role_parse(role_path=None):
@@ -900,16 +993,12 @@ def role_parse(role_path=None):
     for var_path in vars_:
         for root, _, files in os.walk(var_path, topdown=False):
             for name in files:
-                with open(
-                    os.path.join(root, name), "r", encoding="utf-8"
-                ) as f:
-                    content = yaml_load(f)
-                    result.extend(vars_parse(content)[0]["jobs"])
+                content = yaml_load_file(os.path.join(root, name))
+                result.extend(vars_jobs(content))
     for tasks_path in tasks_main:
         if os.path.isfile(tasks_path):
-            with open(tasks_path, "r", encoding="utf-8") as g:
-                content = yaml_load(g)
-                result.extend(AnsibleTasksList(content, prefix=tasks).parse())
+            content = yaml_load_file(tasks_path)
+            result.extend(AnsibleTasksList(content, prefix=tasks).parse())
     return result
 
 
@@ -922,19 +1011,16 @@ def parse_file(file_path):
     Returns:
         list: List of maps with parsed tasks.
     """
-    result = []
-    with open(file_path, "r", encoding="utf-8") as f:
-        ansible_file = yaml_load(f)
-        if isinstance(ansible_file, list):
-            if "hosts" in ansible_file[0]:
-                # Parse the playbook
-                for i in ansible_file:
-                    play = AnsiblePlay(i)
-                    result.append(play.parse())
-            else:
-                # Parse the tasks list
-                t = AnsibleTasksList(ansible_file)
-                result.extend(t.parse())
-        if isinstance(ansible_file, dict):
-            result.extend(vars_parse(ansible_file))
-    return result
+    ansible_file = yaml_load_file(file_path)
+    if not ansible_file:
+        # Empty file or file with comments only
+        return []
+    if isinstance(ansible_file, dict):
+        return vars_parse(ansible_file)
+    if not isinstance(ansible_file, list):
+        return []
+    if "hosts" in ansible_file[0]:
+        # Parse the playbook
+        return [AnsiblePlay(i).parse() for i in ansible_file]
+    # Parse the tasks list
+    return AnsibleTasksList(ansible_file).parse()
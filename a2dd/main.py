@@ -1,4 +1,6 @@
 import argparse
+import os
+
 from a2dd.a2dd import parse_file, role_parse
 from a2dd.utils import yaml_dump
 
@@ -13,7 +15,18 @@ def main():
     parser.add_argument(
         "-f", "--file", dest="file", help="Path to Ansible file"
     )
+    parser.add_argument(
+        "-c",
+        "--cache-dir",
+        dest="cache_dir",
+        help=(
+            "Use modules precompiled with a2dd-precompile from this trusted "
+            "directory, same as setting A2DD_CACHE_DIR"
+        ),
+    )
     args = parser.parse_args()
+    if args.cache_dir:
+        os.environ["A2DD_CACHE_DIR"] = args.cache_dir
 
     if args.role:
         print(yaml_dump(role_parse(role_path=args.role)))
@@ -0,0 +1,87 @@
+import argparse
+import math
+import os
+
+import ruamel.yaml
+
+from a2dd.constants import PRECOMPILED_DIR
+from a2dd.utils import iter_yaml_files, precompiled_path, yaml_load_fast
+
+
+def to_builtin(obj):
+    """Convert a ruamel.yaml object to plain Python types.
+
+    Raises:
+        TypeError: if object can't be written as a Python literal
+    """
+    if isinstance(obj, dict):
+        return {to_builtin(k): to_builtin(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [to_builtin(i) for i in obj]
+    if obj is None or isinstance(obj, bool):
+        return obj
+    # repr() of infinity and NaN isn't a literal which can be executed
+    if isinstance(obj, float) and (math.isinf(obj) or math.isnan(obj)):
+        raise TypeError(f"Can not precompile non-finite float: {obj}")
+    for builtin in (int, float, str):
+        if isinstance(obj, builtin):
+            return builtin(obj)
+    raise TypeError(f"Can not precompile value of type {type(obj)}: {obj}")
+
+
+def precompile_file(file_path):
+    """Write YAML file as a Python module with TASKS, MTIME and SIZE literals.
+
+    Args:
+        file_path (str): Path to Ansible file.
+
+    Returns:
+        str: Path to the written module.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        tasks = to_builtin(yaml_load_fast(f))
+    module_path = precompiled_path(file_path)
+    os.makedirs(os.path.dirname(module_path) or ".", exist_ok=True)
+    with open(module_path, "w", encoding="utf-8") as f:
+        f.write(f"# Precompiled from {os.path.abspath(file_path)}\n")
+        stat = os.stat(file_path)
+        f.write(f"MTIME = {stat.st_mtime_ns}\n")
+        f.write(f"SIZE = {stat.st_size}\n")
+        f.write(f"TASKS = {tasks!r}\n")
+    return module_path
+
+
+def main():
+    """Precompile Ansible YAML files into importable Python modules."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "paths", nargs="+", help="Ansible files or directories to precompile"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        help=(
+            "Directory for precompiled modules, should match A2DD_CACHE_DIR "
+            f"when running a2dd. Default: {PRECOMPILED_DIR}"
+        ),
+    )
+    args = parser.parse_args()
+    if args.output:
+        os.environ["A2DD_CACHE_DIR"] = args.output
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(iter_yaml_files(path))
+        else:
+            files.append(path)
+    for file_path in files:
+        try:
+            print(f"{file_path} -> {precompile_file(file_path)}")
+        except (TypeError, ruamel.yaml.YAMLError) as e:
+            print(f"Skipping {file_path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import functools
+import hashlib
+import importlib.util
+import os
+
 import ruamel.yaml
 
-from a2dd.constants import TASK_ATTRS
+from a2dd.constants import PRECOMPILED_DIR, TASK_ATTRS
 
 
 class NewDumper(ruamel.yaml.RoundTripDumper):
@@ -33,18 +38,271 @@ class NewDumper(ruamel.yaml.RoundTripDumper):
         return node
 
 
+try:
+    from ruamel.yaml.cyaml import CEmitter
+except ImportError:  # ruamel.yaml.clib is not installed
+    CEmitter = None
+
+if CEmitter is not None:
+
+    class NewCDumper(
+        CEmitter,
+        ruamel.yaml.representer.RoundTripRepresenter,
+        ruamel.yaml.resolver.VersionedResolver,
+    ):
+        """NewDumper representation with libyaml emitter.
+
+        libyaml emitter doesn't write comments, writes a trailing space
+        after keys with None value, refuses block literals with tabs,
+        non-ASCII characters or trailing spaces, folds long double quoted
+        strings in another way and prefers single quotes for strings with
+        them. yaml_dump_fast uses it only for content where output is the
+        same as of NewDumper.
+        """
+
+        def __init__(  # pylint: disable=W0613
+            self,
+            stream,
+            default_style=None,
+            default_flow_style=None,
+            canonical=None,
+            indent=None,
+            width=None,
+            allow_unicode=None,
+            line_break=None,
+            encoding=None,
+            explicit_start=None,
+            explicit_end=None,
+            version=None,
+            tags=None,
+            **kwargs,
+        ):
+            CEmitter.__init__(
+                self,
+                stream,
+                canonical=canonical,
+                indent=indent,
+                width=width,
+                encoding=encoding,
+                allow_unicode=allow_unicode,
+                line_break=line_break,
+                explicit_start=explicit_start,
+                explicit_end=explicit_end,
+                version=version,
+                tags=tags,
+            )
+            self._emitter = self._serializer = self._representer = self
+            ruamel.yaml.representer.RoundTripRepresenter.__init__(
+                self,
+                default_style=default_style,
+                default_flow_style=default_flow_style,
+                dumper=self,
+            )
+            ruamel.yaml.resolver.VersionedResolver.__init__(self, loader=self)
+
+        should_use_block = NewDumper.should_use_block
+        represent_scalar = NewDumper.represent_scalar
+
+else:
+    NewCDumper = NewDumper
+
+
+class Yaml11Resolver(ruamel.yaml.resolver.VersionedResolver):
+    """Resolver which always uses YAML 1.1 rules, as Ansible does."""
+
+    processing_version = (1, 1)
+
+
+# Creating YAML instance registers all resolvers and constructors, so it's
+# created once and reused for all loaded documents.
+_YAML_LOADER = ruamel.yaml.YAML(typ="rt")
+_YAML_LOADER.Resolver = Yaml11Resolver
+# Safe loader uses libyaml parser when ruamel.yaml.clib is installed and
+# falls back to the pure Python one otherwise
+_YAML_SAFE_LOADER = ruamel.yaml.YAML(typ="safe")
+_YAML_SAFE_LOADER.Resolver = Yaml11Resolver
+
+
 def yaml_dump(content):
     """Dump a ruamel.yaml object (dictionary)."""
+    # Dumper is not shared: YAML instance would also dump comments of
+    # mapping items loaded from source into the context comments.
     return ruamel.yaml.dump(
         content, Dumper=NewDumper, default_flow_style=False
     )
 
 
+# Python emitter is only used to analyze scalars, it never writes
+_SCALAR_ANALYZER = NewDumper(None)
+
+
+def _needs_python_scalar(value):
+    """Check if NewDumper writes a string as block literal or double quoted.
+
+    Emitters write plain and single quoted strings the same way.
+    """
+    # Non-ASCII, non-printable and line break characters are escaped in
+    # double quotes or make a block literal
+    if not (value.isascii() and value.isprintable()):
+        return True
+    # Strings with single quotes are double quoted if they can't be plain
+    if "'" in value:
+        return not _SCALAR_ANALYZER.analyze_scalar(value).allow_block_plain
+    return False
+
+
+def _needs_python_emitter(content):
+    """Check if libyaml emitter would dump content differently than yaml_dump.
+
+    It happens for ruamel.yaml objects which may carry comments, for
+    mappings with None values and for strings which NewDumper writes as
+    block literals or double quoted.
+    """
+    if isinstance(content, str):
+        return _needs_python_scalar(content)
+    if isinstance(content, ruamel.yaml.comments.CommentedBase):
+        return True
+    if isinstance(content, dict):
+        return any(
+            v is None or _needs_python_emitter(k) or _needs_python_emitter(v)
+            for k, v in content.items()
+        )
+    if isinstance(content, list):
+        return any(_needs_python_emitter(i) for i in content)
+    return False
+
+
+def yaml_dump_fast(content):
+    """Dump a ruamel.yaml object, with libyaml emitter where it's possible.
+
+    Output is the same as of yaml_dump: content which libyaml emitter
+    would write differently is dumped with yaml_dump.
+    """
+    if _needs_python_emitter(content):
+        return yaml_dump(content)
+    return ruamel.yaml.dump(
+        content, Dumper=NewCDumper, default_flow_style=False
+    )
+
+
 def yaml_load(stringg):
     """Load a ruamel.yaml object (dictionary) from string."""
-    return ruamel.yaml.load(
-        stringg, ruamel.yaml.RoundTripLoader, version=(1, 1)
+    return _YAML_LOADER.load(stringg)
+
+
+def yaml_load_fast(stringg):
+    """Load plain Python objects from string, with libyaml if available.
+
+    Styles and comments of the source are not kept.
+    """
+    return _YAML_SAFE_LOADER.load(stringg)
+
+
+@functools.lru_cache(maxsize=256)
+def _load_yaml_cached(path, mtime, size):  # pylint: disable=W0613
+    """Load a YAML file, cache is keyed by path, modification time and size."""
+    # Whole file is passed as bytes, so libyaml parses it from one buffer
+    # instead of reading the file object chunk by chunk
+    with open(path, "rb") as f:
+        data = f.read()
+    return yaml_load_fast(data)
+
+
+def precompiled_path(file_path, cache_dir=None):
+    """Return path of precompiled Python module for the YAML file."""
+    name = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()
+    if cache_dir is None:
+        cache_dir = os.environ.get("A2DD_CACHE_DIR", PRECOMPILED_DIR)
+    return os.path.join(cache_dir, f"{name}.py")
+
+
+@functools.lru_cache(maxsize=256)
+def _load_precompiled(module_path, mtime, size):
+    """Load tasks from precompiled module if it's up to date with file.
+
+    Module is executed once per module path and source file modification
+    time and size. Misses raise, so they aren't cached and a module which
+    is written later is used.
+
+    Raises:
+        LookupError: if there is no precompiled module or it's outdated.
+    """
+    if not os.path.isfile(module_path):
+        raise LookupError(f"No precompiled module {module_path}")
+    spec = importlib.util.spec_from_file_location(
+        f"a2dd_cache.{os.path.basename(module_path)[:-3]}", module_path
     )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if (
+        getattr(module, "MTIME", None) != mtime
+        or getattr(module, "SIZE", None) != size
+    ):
+        raise LookupError(f"Precompiled module {module_path} is outdated")
+    return module.TASKS
+
+
+def _copy_plain(obj):
+    """Copy plain Python object loaded from YAML, faster than deepcopy."""
+    if isinstance(obj, dict):
+        return {k: _copy_plain(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_copy_plain(i) for i in obj]
+    return obj
+
+
+def yaml_load_file(file_path):
+    """Load plain Python objects from file, reusing them if file is unchanged.
+
+    Modules precompiled with a2dd-precompile are used first when
+    A2DD_CACHE_DIR is set. File is loaded from YAML otherwise and when its
+    module is missing, outdated or fails to run. Precompiled modules are
+    executed, so the directory must be trusted. Parsers modify loaded
+    tasks in place, so a copy of the cached object is returned.
+
+    Args:
+        file_path (str): Path to YAML file.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    cache_dir = os.environ.get("A2DD_CACHE_DIR")
+    if cache_dir:
+        try:
+            tasks = _load_precompiled(
+                precompiled_path(path, cache_dir),
+                stat.st_mtime_ns,
+                stat.st_size,
+            )
+        # Missing, outdated or broken module, file is loaded from YAML then
+        except Exception:  # pylint: disable=W0718
+            pass
+        else:
+            return _copy_plain(tasks)
+    loaded = _load_yaml_cached(path, stat.st_mtime_ns, stat.st_size)
+    return _copy_plain(loaded)
+
+
+def iter_yaml_files(directory):
+    """Yield paths of .yml and .yaml files in directory tree.
+
+    Files are yielded in top-down os.walk order, files of a directory
+    before its subdirectories.
+
+    Directory entries are classified with os.scandir, which on most
+    platforms doesn't need a stat call per entry.
+    """
+    stack = [directory]
+    while stack:
+        subdirs = []
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif (
+                    entry.name.endswith((".yml", ".yaml")) and entry.is_file()
+                ):
+                    yield entry.path
+        stack.extend(reversed(subdirs))
 
 
 def add_comment(ruamel_obj, comment):
@@ -53,6 +311,14 @@ def add_comment(ruamel_obj, comment):
         ruamel_obj.yaml_set_start_comment(comment)
 
 
+@functools.lru_cache(maxsize=4096)
+def _action_from_keys(keys):
+    """Return task keys which are actions, cached by set of task keys."""
+    return tuple(
+        k for k in keys if k not in TASK_ATTRS and not k.startswith("with_")
+    )
+
+
 def get_task_action(task):
     """Return the action of the task."""
     if "action" in task or "local_action" in task:
@@ -66,24 +332,31 @@ def get_task_action(task):
             return task[action]["module"]
         # - action: copy src=a dest=b
         return task[action].split()[0]
-    with_items = []
-    for t in task:
-        if t.startswith("with_"):
-            with_items.append(t)
-    action = set(list(task.keys())).difference(set(TASK_ATTRS + with_items))
+    # Tasks have just a few shapes of keys, so action keys are cached
+    action = _action_from_keys(frozenset(task))
 
     if len(action) > 1:
         raise Exception(f"Task has more than one action: {task}")
     if len(action) == 0:
         raise Exception(f"Can't get action from task: {task}")
-    return list(action)[0]
+    return action[0]
 
 
-def string2dict(x_string):
-    """Convert a string to a dictionary."""
+@functools.lru_cache(maxsize=4096)
+def _string2dict_cached(x_string):
+    """Convert a string to a dictionary, cached by the string."""
     try:
         new_dict = dict(k.split("=") for k in x_string.split())
     except Exception as e:
         print(f"Can't convert string to dict: {x_string}")
         raise e
     return yaml_load(yaml_dump(new_dict))
+
+
+def string2dict(x_string):
+    """Convert a string to a dictionary.
+
+    Same strings repeat a lot in tasks, so converted dictionary is cached
+    and a copy of it is returned, as parsers may modify it.
+    """
+    return _string2dict_cached(x_string).copy()
@@ -0,0 +1,258 @@
+# Shared walking and loading of Ansible tasks for extracter scripts
+
+import functools
+import itertools
+import os
+import shelve
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+# libyaml based loader is much faster, if PyYAML is built with it
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Parsed tasks of files are cached between runs
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "ansible2dd",
+)
+CACHE_MIN_SIZE = 4096
+# Stored with each cache entry, bump it when file_tasks output changes so
+# entries written by older code are parsed again
+CACHE_VERSION = 2
+
+TASK_ATTRS = [
+    "action",
+    "any_errors_fatal",
+    "args",
+    "async",
+    "become",
+    "become_exe",
+    "become_flags",
+    "become_method",
+    "become_user",
+    "changed_when",
+    "check_mode",
+    "collections",
+    "connection",
+    "debugger",
+    "delay",
+    "delegate_facts",
+    "delegate_to",
+    "diff",
+    "environment",
+    "failed_when",
+    "ignore_errors",
+    "ignore_unreachable",
+    "local_action",
+    "loop",
+    "loop_control",
+    "module_defaults",
+    "name",
+    "no_log",
+    "notify",
+    "poll",
+    "port",
+    "register",
+    "remote_user",
+    "retries",
+    "run_once",
+    "tags",
+    "throttle",
+    "timeout",
+    "until",
+    "vars",
+    "when",
+    "with_",
+]
+_TASK_ATTRS = frozenset(TASK_ATTRS)
+
+
+@functools.lru_cache(maxsize=4096)
+def _action_from_keys(keys):
+    """Return task keys which are actions, cached by set of task keys."""
+    return tuple(
+        k for k in keys if k not in _TASK_ATTRS and not k.startswith("with_")
+    )
+
+
+def get_task_action(task):
+    """Return the action of the task."""
+    if "action" in task or "local_action" in task:
+        action = "action" if "action" in task else "local_action"
+        if "module" in task[action]:
+            # - action:
+            #     module: copy
+            #     args:
+            #       src: a
+            #       dest: b
+            return task[action]["module"]
+        # - action: copy src=a dest=b
+        return task[action].split()[0]
+    action = _action_from_keys(frozenset(task))
+
+    if len(action) > 1:
+        raise Exception(f"Task has more than one action: {task}")
+    if len(action) == 0:
+        raise Exception(f"Can't get action from task: {task}")
+    action = action[0]
+    if action.startswith("ansible.builtin"):
+        return action.split(".")[-1]
+    return action
+
+
+def iter_yaml_files(directory):
+    """Yield YAML files of a tree, except puppet ones and molecule dirs."""
+    stack = [directory]
+    while stack:
+        subdirs = []
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if "molecule" not in entry.name:
+                        subdirs.append(entry.path)
+                elif (
+                    entry.name.endswith((".yml", ".yaml"))
+                    and "puppet" not in entry.name
+                    and entry.is_file()
+                ):
+                    yield entry.path
+        stack.extend(reversed(subdirs))
+
+
+# Heat template role_data keys which hold Ansible tasks
+_HEAT_PREPS = (
+    "upgrade_tasks",
+    "pre_upgrade_rolling_tasks",
+    "post_upgrade_tasks",
+    "update_tasks",
+    "post_update_tasks",
+    "host_prep_tasks",
+    "external_deploy_tasks",
+    "external_post_deploy_tasks",
+)
+
+
+def _block_tasks(task):
+    """Return tasks of a block."""
+    return task["block"]
+
+
+def _play_tasks(task):
+    """Return tasks of a playbook."""
+    return (
+        task.get("tasks", [])
+        + task.get("pre_tasks", [])
+        + task.get("post_tasks", [])
+    )
+
+
+def _heat_tasks(task):
+    """Return Ansible tasks of a heat template."""
+    if "role_data" not in task["outputs"]:
+        return ()
+    new_tasks = task["outputs"]["role_data"]
+    return itertools.chain.from_iterable(
+        new_tasks.get(prep, ()) for prep in _HEAT_PREPS
+    )
+
+
+# Keys of items which hold lists of tasks, with getters of those tasks,
+# any other item is a task itself
+_TASK_LISTS = (
+    ("block", _block_tasks),
+    ("hosts", _play_tasks),
+    # in case of heat templates
+    ("outputs", _heat_tasks),
+)
+
+
+def file_tasks(file):
+    """Return Ansible tasks of a file, unrolling blocks, plays and heat.
+
+    Errors are returned as messages with the tasks which could be read,
+    so they are printed by the main process.
+    """
+    tasks = []
+    errors = []
+    with open(file, "rb") as f:
+        try:
+            y = yaml.load(f.read(), Loader=Loader)
+        except yaml.scanner.ScannerError as ye:
+            errors.append(f"Error parsing YAML in {file}: {ye}")
+            return tasks, errors
+    if y:
+        for task in y:
+            try:
+                # Safe loader builds plain dicts, anything else isn't a task
+                if type(task) is not dict:
+                    continue
+                for key, get_tasks in _TASK_LISTS:
+                    if key in task:
+                        tasks.extend(get_tasks(task))
+                        break
+                else:
+                    tasks.append(task)
+            except Exception as e:
+                errors.append(f"Error in file: {file}: {e}")
+    return tasks, errors
+
+
+def _load_files(files, jobs=None):
+    """Return tasks and errors of files, loaded by `jobs` processes."""
+    if jobs == 1 or len(files) < 2:
+        return [file_tasks(file) for file in files]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(file_tasks, files, chunksize=16))
+
+
+def _load_files_cached(files, jobs=None):
+    """Return tasks and errors of files, reusing unchanged files from cache.
+
+    Cache is kept by the main process only, as shelve doesn't support
+    concurrent writers. Small files are cheap to parse and aren't cached.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with shelve.open(os.path.join(CACHE_DIR, "parse")) as cache:
+        results = {}
+        stamps = {}
+        for file in files:
+            stat = os.stat(file)
+            if stat.st_size < CACHE_MIN_SIZE:
+                continue
+            path = os.path.abspath(file)
+            stamps[file] = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+            cached = cache.get(path)
+            if cached and cached[:3] == stamps[file]:
+                results[file] = (cached[3], [])
+        to_load = [file for file in files if file not in results]
+        for file, loaded in zip(to_load, _load_files(to_load, jobs)):
+            results[file] = loaded
+            tasks, errors = loaded
+            # Files with errors aren't cached, so errors are reported again
+            if not errors and file in stamps:
+                cache[os.path.abspath(file)] = (*stamps[file], tasks)
+    return [results[file] for file in files]
+
+
+def iter_parsed_tasks(paths, parse_task, jobs=None, cache=True):
+    """Yield results of parse_task for tasks of files and directories.
+
+    Files are loaded by a pool of `jobs` processes and, when `cache` is
+    set, parsed tasks of unchanged files are reused from previous runs.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(iter_yaml_files(path))
+        elif os.path.isfile(path):
+            files.append(path)
+    load = _load_files_cached if cache else _load_files
+    for file, (tasks, errors) in zip(files, load(files, jobs)):
+        for error in errors:
+            print(error)
+        for task in tasks:
+            try:
+                yield parse_task(task)
+            except Exception as e:
+                print(f"Error in file: {file}: {e}")
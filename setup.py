@@ -1,3 +1,18 @@
+import os
+
 import setuptools
 
-setuptools.setup(pbr=True)
+ext_modules = []
+# Optionally compile hot parsing helpers with Cython, e.g.
+# A2DD_CYTHONIZE=1 pip install . ; pure Python modules are used otherwise.
+if os.environ.get("A2DD_CYTHONIZE"):
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        print("Cython is not installed, a2dd modules are not compiled")
+    else:
+        ext_modules = cythonize(
+            ["a2dd/utils.py"], compiler_directives={"language_level": 3}
+        )
+
+setuptools.setup(pbr=True, ext_modules=ext_modules)